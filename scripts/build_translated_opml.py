@@ -11,24 +11,37 @@ Usage:
 """
 from __future__ import annotations
 import argparse, os, re, xml.etree.ElementTree as ET
+from collections import defaultdict
 from dotenv import load_dotenv
+from lxml import etree
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_DASH_RE = re.compile(r"-{2,}")
 
 def slugify(s: str) -> str:
     s = s.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-{2,}", "-", s).strip("-")
+    s = _SLUG_RE.sub("-", s)
+    s = _DASH_RE.sub("-", s).strip("-")
     return s or "feed"
 
 def parse_opml_titles(opml_path: str):
-    tree = ET.parse(opml_path)
-    root = tree.getroot()
     titles = []
-    for el in root.iter():
-        if el.tag.lower().endswith("outline"):
-            xmlurl = el.attrib.get("xmlUrl") or el.attrib.get("xmlurl")
-            text = el.attrib.get("text") or el.attrib.get("title") or "Feed"
-            if xmlurl:
-                titles.append(text)
+    # Stream the document and drop each element once closed, so memory stays flat on large OPMLs.
+    # Attributes are read on "start" so outlines keep document order (parent before children).
+    for event, el in etree.iterparse(opml_path, events=("start", "end")):
+        if event == "start":
+            if el.tag.lower().endswith("outline"):
+                xmlurl = el.get("xmlUrl") or el.get("xmlurl")
+                text = el.get("text") or el.get("title") or "Feed"
+                if xmlurl:
+                    titles.append(text)
+            continue
+        el.clear()
+        parent = el.getparent()
+        if parent is None:
+            continue
+        while el.getprevious() is not None:
+            del parent[0]
     # dedupe preserving order
     seen=set(); out=[]
     for t in titles:
@@ -52,8 +65,12 @@ def main():
 
     titles = parse_opml_titles(args.source_opml)
 
-    # Map expected filenames from titles to actual files
-    files = {fn: os.path.join(args.translated_dir, fn) for fn in os.listdir(args.translated_dir) if fn.lower().endswith(".xml")}
+    # Map expected filenames from titles to actual files.
+    # Files are named <slug>.<lang>.xml and slugs never contain '.', so index them by slug.
+    files = {e.name: e.path for e in os.scandir(args.translated_dir) if e.name.lower().endswith(".xml")}
+    by_slug = defaultdict(list)
+    for fn in files:
+        by_slug[fn.split(".", 1)[0]].append(fn)
 
     opml = ET.Element("opml", {"version":"2.0"})
     head = ET.SubElement(opml, "head")
@@ -65,8 +82,7 @@ def main():
     missing = 0
     for t in titles:
         # We don't know target lang in filename; add all matching patterns
-        prefix = slugify(t) + "."
-        matched = [fn for fn in files.keys() if fn.startswith(prefix)]
+        matched = by_slug.get(slugify(t), [])
         if not matched:
             missing += 1
             continue
@@ -4,124 +4,29 @@ Creates HTML pages, JSON summaries, and audio briefs
 """
 
 import os
+import re
 import json
+import asyncio
+import ahocorasick
 import feedparser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from html import escape, unescape
 from pathlib import Path
 from typing import List, Dict
 from collections import defaultdict
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class DailySiteGenerator:
-    def __init__(self, feeds_dir: str, output_dir: str):
-        self.feeds_dir = Path(feeds_dir)
-        self.output_dir = Path(output_dir)
-        self.today = datetime.now().strftime("%Y-%m-%d")
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # Country/topic mappings
-        self.country_keywords = {
-            "cuba": ["cuba", "cuban", "havana", "granma"],
-            "venezuela": ["venezuela", "venezuelan", "caracas", "pdvsa", "maduro"],
-            "haiti": ["haiti", "haitian", "port-au-prince"],
-            "dr": ["dominican", "santo domingo", "diario libre"]
-        }
-    
-    def collect_stories(self) -> Dict[str, List[Dict]]:
-        """Collect all stories from feeds, categorized by country"""
-        stories = defaultdict(list)
-        
-        for feed_file in self.feeds_dir.glob("*.en.xml"):
-            try:
-                feed = feedparser.parse(str(feed_file))
-                
-                for entry in feed.entries:
-                    story = {
-                        "title": entry.get("title", ""),
-                        "link": entry.get("link", ""),
-                        "summary": entry.get("summary", "")[:500],  # Limit summary length
-                        "published": entry.get("published", ""),
-                        "source": feed.feed.get("title", ""),
-                    }
-                    
-                    # Categorize by country
-                    for country, keywords in self.country_keywords.items():
-                        if any(kw in story["title"].lower() or kw in story["summary"].lower() 
-                               for kw in keywords):
-                            stories[country].append(story)
-                    
-                    # Always add to "caribbean" (general)
-                    stories["caribbean"].append(story)
-                    
-            except Exception as e:
-                print(f"Error parsing {feed_file}: {e}")
-        
-        return stories
-    
-    def generate_summary(self, stories: List[Dict], country: str) -> str:
-        """Use OpenAI to generate a summary of the day's stories"""
-        if not stories:
-            return f"No significant news from {country.title()} today."
-        
-        # Prepare story text (limit to top 15 stories)
-        story_text = "\n\n".join([
-            f"**{s['title']}**\n{s['summary']}"
-            for s in stories[:15]
-        ])
-        
-        prompt = f"""You are a geopolitical analyst specializing in Caribbean affairs.
-
-Summarize today's key developments in {country.upper()} based on these news stories:
-
-{story_text}
-
-Provide:
-1. A 2-3 sentence executive summary
-2. 3-5 key bullet points of the most important developments
-3. Brief analysis of implications
-
-Keep it factual and concise."""
-
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error generating summary: {e}")
-            return f"Summary generation failed: {e}"
-    
-    def generate_audio_brief(self, summary_text: str, country: str) -> str:
-        """Generate audio brief using OpenAI TTS"""
-        audio_file = self.output_dir / "audio" / f"{self.today}-{country}.mp3"
-        audio_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice="nova",
-                input=f"{country.upper()} Intelligence Brief for {self.today}.\n\n{summary_text}"
-            )
-            with open(audio_file, "wb") as f:`n                f.write(response.content)
-            return f"audio/{self.today}-{country}.mp3"
-        except Exception as e:
-            print(f"Error generating audio: {e}")
-            return None
-    
-    def create_html_page(self, country: str, stories: List[Dict], summary: str, audio_path: str = None):
-        """Generate HTML page for a country"""
-        
-        html = f"""<!DOCTYPE html>
+# Page templates for create_html_page; every substituted value is HTML-escaped first
+PAGE_HEADER = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{country.upper()} Intelligence Brief - {self.today}</title>
+    <title>{country} Intelligence Brief - {today}</title>
     <style>
         body {{
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
@@ -191,8 +96,8 @@ Keep it factual and concise."""
 </head>
 <body>
     <div class="header">
-        <h1> {country.upper()} Intelligence Brief</h1>
-        <p> {self.today} | {len(stories)} stories</p>
+        <h1> {country} Intelligence Brief</h1>
+        <p> {today} | {count} stories</p>
         <div class="nav">
             <a href="../.."> Home</a>
             <a href="../../countries/cuba">Cuba</a>
@@ -204,28 +109,217 @@ Keep it factual and concise."""
     
     <div class="summary">
         <h2> Executive Summary</h2>
-        {f'<audio controls><source src="../../{audio_path}" type="audio/mpeg"></audio>' if audio_path else ''}
+        {audio}
         <div>{summary}</div>
     </div>
     
-    <h2> Today's Stories ({len(stories)})</h2>
+    <h2> Today's Stories ({count})</h2>
 """
-        
-        for story in stories[:30]:  # Limit to 30 stories
-            html += f"""
+
+AUDIO_TMPL = '<audio controls><source src="../../{src}" type="audio/mpeg"></audio>'
+
+STORY_TMPL = """
     <div class="story">
-        <h3><a href="{story['link']}" target="_blank">{story['title']}</a></h3>
-        <p>{story['summary']}</p>
+        <h3><a href="{link}" target="_blank">{title}</a></h3>
+        <p>{summary}</p>
         <div class="meta">
-             {story['source']}
+             {source}
         </div>
     </div>
 """
-        
-        html += """
+
+PAGE_FOOTER = """
 </body>
 </html>
 """
+
+# Story summaries are HTML fragments (and cut at 500 chars); pages show them as plain text
+_TAG_RE = re.compile(r"<[^>]*>?")
+
+def _plain_text(fragment: str) -> str:
+    return " ".join(unescape(_TAG_RE.sub(" ", fragment)).split())
+
+
+class DailySiteGenerator:
+    def __init__(self, feeds_dir: str, output_dir: str, max_concurrency: int = 4):
+        self.feeds_dir = Path(feeds_dir)
+        self.output_dir = Path(output_dir)
+        self.today = datetime.now().strftime("%Y-%m-%d")
+        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.max_concurrency = max_concurrency
+        
+        # Country/topic mappings
+        self.country_keywords = {
+            "cuba": ["cuba", "cuban", "havana", "granma"],
+            "venezuela": ["venezuela", "venezuelan", "caracas", "pdvsa", "maduro"],
+            "haiti": ["haiti", "haitian", "port-au-prince"],
+            "dr": ["dominican", "santo domingo", "diario libre"]
+        }
+        self.keyword_automaton = self._build_keyword_automaton()
+    
+    def _build_keyword_automaton(self) -> ahocorasick.Automaton:
+        """Compile every country keyword into one automaton mapping keyword -> countries"""
+        countries_by_kw = defaultdict(set)
+        for country, keywords in self.country_keywords.items():
+            for kw in keywords:
+                countries_by_kw[kw].add(country)
+        
+        automaton = ahocorasick.Automaton()
+        for kw, countries in countries_by_kw.items():
+            automaton.add_word(kw, frozenset(countries))
+        automaton.make_automaton()
+        return automaton
+    
+    def collect_stories(self) -> Dict[str, List[Dict]]:
+        """Collect all stories from feeds, categorized by country"""
+        stories = defaultdict(list)
+        feed_files = list(self.feeds_dir.glob("*.en.xml"))
+        
+        # Reuse stories from feeds whose file hasn't changed since the last run
+        cache_path = self.output_dir / ".feed_cache.json"
+        cache = self._load_feed_cache(cache_path)
+        current = {}
+        stale = []
+        for feed_file in feed_files:
+            mtime = feed_file.stat().st_mtime
+            cached = cache.get(str(feed_file))
+            if cached and cached.get("mtime") == mtime:
+                current[str(feed_file)] = cached
+            else:
+                stale.append((feed_file, mtime))
+        
+        # Parse changed feeds in parallel; merging stays in this thread
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(16, len(stale))) as pool:
+                parsed = list(pool.map(self._parse_feed, [feed_file for feed_file, _ in stale]))
+            for (feed_file, mtime), feed_stories in zip(stale, parsed):
+                if feed_stories is not None:
+                    current[str(feed_file)] = {"mtime": mtime, "stories": feed_stories}
+        print(f"   {len(feed_files) - len(stale)} feeds unchanged, {len(stale)} parsed")
+        
+        for feed_file in feed_files:
+            entry = current.get(str(feed_file))
+            if entry is None:
+                continue
+            for story in entry["stories"]:
+                # Categorize by country: lowercase once, then one automaton pass finds every keyword hit.
+                # "\x01" never occurs in keywords, so multi-word ones can't match across title and summary.
+                text = story["title"].lower() + "\x01" + story["summary"].lower()
+                hits = set()
+                for _, countries in self.keyword_automaton.iter(text):
+                    hits |= countries
+                for country in self.country_keywords:
+                    if country in hits:
+                        stories[country].append(story)
+                
+                # Always add to "caribbean" (general)
+                stories["caribbean"].append(story)
+        
+        # Only feeds that still exist are kept
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(current, ensure_ascii=False), encoding="utf-8")
+        return stories
+    
+    def _load_feed_cache(self, cache_path: Path) -> Dict[str, Dict]:
+        if not cache_path.exists():
+            return {}
+        try:
+            return json.loads(cache_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"Ignoring unreadable feed cache {cache_path}: {e}")
+            return {}
+    
+    def _parse_feed(self, feed_file: Path):
+        """Parse one feed file into story dicts; None if it can't be read"""
+        try:
+            feed = feedparser.parse(str(feed_file))
+            return [
+                {
+                    "title": entry.get("title", ""),
+                    "link": entry.get("link", ""),
+                    "summary": entry.get("summary", "")[:500],  # Limit summary length
+                    "published": entry.get("published", ""),
+                    "source": feed.feed.get("title", ""),
+                }
+                for entry in feed.entries
+            ]
+        except Exception as e:
+            print(f"Error parsing {feed_file}: {e}")
+            return None
+    
+    async def generate_summary(self, stories: List[Dict], country: str) -> str:
+        """Use OpenAI to generate a summary of the day's stories"""
+        if not stories:
+            return f"No significant news from {country.title()} today."
+        
+        # Prepare story text (limit to top 15 stories)
+        story_text = "\n\n".join([
+            f"**{s['title']}**\n{s['summary']}"
+            for s in stories[:15]
+        ])
+        
+        prompt = f"""You are a geopolitical analyst specializing in Caribbean affairs.
+
+Summarize today's key developments in {country.upper()} based on these news stories:
+
+{story_text}
+
+Provide:
+1. A 2-3 sentence executive summary
+2. 3-5 key bullet points of the most important developments
+3. Brief analysis of implications
+
+Keep it factual and concise."""
+
+        try:
+            response = await self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            print(f"Error generating summary: {e}")
+            return f"Summary generation failed: {e}"
+    
+    async def generate_audio_brief(self, summary_text: str, country: str) -> str:
+        """Generate audio brief using OpenAI TTS"""
+        audio_file = self.output_dir / "audio" / f"{self.today}-{country}.mp3"
+        audio_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            response = await self.client.audio.speech.create(
+                model="tts-1",
+                voice="nova",
+                input=f"{country.upper()} Intelligence Brief for {self.today}.\n\n{summary_text}"
+            )
+            with open(audio_file, "wb") as f:
+                f.write(response.content)
+            return f"audio/{self.today}-{country}.mp3"
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            return None
+    
+    def create_html_page(self, country: str, stories: List[Dict], summary: str, audio_path: str = None):
+        """Generate HTML page for a country"""
+        
+        parts = [PAGE_HEADER.format(
+            country=escape(country.upper()),
+            today=escape(self.today),
+            count=len(stories),
+            audio=AUDIO_TMPL.format(src=escape(audio_path)) if audio_path else "",
+            summary=escape(summary),
+        )]
+        
+        for story in stories[:30]:  # Limit to 30 stories
+            parts.append(STORY_TMPL.format(
+                link=escape(story["link"]),
+                title=escape(story["title"]),
+                summary=escape(_plain_text(story["summary"])),
+                source=escape(story["source"]),
+            ))
+        
+        parts.append(PAGE_FOOTER)
         
         # Save HTML
         if country == "caribbean":
@@ -234,7 +328,7 @@ Keep it factual and concise."""
             html_path = self.output_dir / "countries" / country / "index.html"
         
         html_path.parent.mkdir(parents=True, exist_ok=True)
-        html_path.write_text(html, encoding="utf-8")
+        html_path.write_text("".join(parts), encoding="utf-8")
         print(f" Created {html_path}")
     
     def save_json(self, country: str, stories: List[Dict], summary: str):
@@ -253,35 +347,44 @@ Keep it factual and concise."""
         json_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
         print(f" Created {json_path}")
     
-    def generate(self):
-        """Main generation process"""
-        print(f" Generating daily site for {self.today}...")
-        
-        # Collect stories
-        print(" Collecting stories from feeds...")
-        stories_by_country = self.collect_stories()
-        
-        for country, stories in stories_by_country.items():
-            if not stories:
-                continue
-            
+    async def _process_country(self, country: str, stories: List[Dict], slots: asyncio.Semaphore):
+        """Summary, then audio brief, then page + JSON for one country"""
+        async with slots:
             print(f"\n Processing {country.upper()} ({len(stories)} stories)...")
             
             # Generate summary
-            print("   Generating AI summary...")
-            summary = self.generate_summary(stories, country)
+            print(f"   [{country}] Generating AI summary...")
+            summary = await self.generate_summary(stories, country)
             
             # Generate audio (only for main regions to save API costs)
             audio_path = None
             if country in ["caribbean", "cuba"]:
-                print("   Generating audio brief...")
-                audio_path = self.generate_audio_brief(summary, country)
-            
-            # Create HTML page
-            self.create_html_page(country, stories, summary, audio_path)
-            
-            # Save JSON
-            self.save_json(country, stories, summary)
+                print(f"   [{country}] Generating audio brief...")
+                audio_path = await self.generate_audio_brief(summary, country)
+        
+        # Create HTML page
+        self.create_html_page(country, stories, summary, audio_path)
+        
+        # Save JSON
+        self.save_json(country, stories, summary)
+    
+    async def _generate_async(self):
+        # Countries are independent, so their OpenAI calls run concurrently
+        slots = asyncio.Semaphore(self.max_concurrency)
+        stories_by_country = self.collect_stories()
+        await asyncio.gather(*[
+            self._process_country(country, stories, slots)
+            for country, stories in stories_by_country.items()
+            if stories
+        ])
+    
+    def generate(self):
+        """Main generation process"""
+        print(f" Generating daily site for {self.today}...")
+        
+        # Collect stories
+        print(" Collecting stories from feeds...")
+        asyncio.run(self._generate_async())
         
         print(f"\n Site generation complete! Output: {self.output_dir}")
         print(f"   Open: {self.output_dir}/index.html")
@@ -16,19 +16,34 @@ import os
 import re
 import shutil
 import sys
-import xml.etree.ElementTree as ET
+
+from lxml import etree
+
+
+# C0 control chars except legal whitespace (\t, \n, \r), plus DEL; deleted via str.translate
+_CTRL_DELETE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+# Bare ampersands not part of a valid XML entity
+_AMP_RE = re.compile(r"&(?!(?:amp|lt|gt|quot|apos);|#[0-9]+;|#x[0-9A-Fa-f]+;)")
 
 
 def sanitize_text(text: str) -> str:
-    # Remove C0 control chars except legal whitespace
-    text = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", text)
-    # Escape bare ampersands not part of a valid XML entity
-    text = re.sub(
-        r"&(?!(?:amp|lt|gt|quot|apos);|#[0-9]+;|#x[0-9A-Fa-f]+;)", "&amp;", text
-    )
+    text = text.translate(_CTRL_DELETE)
+    text = _AMP_RE.sub("&amp;", text)
     return text
 
 
+def check_parses(path: str) -> None:
+    """Stream-parse `path`, raising on the first XML error."""
+    for _, el in etree.iterparse(path, events=("end",)):
+        el.clear()
+        # The root's "siblings" are top-level comments/PIs and it has no parent to delete them from
+        parent = el.getparent()
+        if parent is None:
+            continue
+        while el.getprevious() is not None:
+            del parent[0]
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--path", default="config/caribbean_intel.opml", help="Path to OPML file")
@@ -61,7 +76,7 @@ def main() -> None:
 
     # Sanity-check parse
     try:
-        ET.parse(args.out)
+        check_parses(args.out)
         print("Sanitized OPML parses OK.")
     except Exception as e:
         print("Sanitized OPML still fails to parse:", e)
@@ -11,18 +11,22 @@ Usage:
   python scripts/translate_rss.py --opml path/to/input.opml --out_dir output/feeds
 """
 from __future__ import annotations
-import argparse, hashlib, os, re, sqlite3, sys, time
+import argparse, asyncio, hashlib, json, os, re, sqlite3, sys, tempfile, time
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import unescape
 from typing import List, Optional, Tuple, Dict
+from urllib.parse import urlsplit
+import aiohttp
 import feedparser
-import requests
-from bs4 import BeautifulSoup
-from dateutil import parser as dateparser
+from charset_normalizer import from_bytes
+from selectolax.lexbor import LexborHTMLParser
 from dotenv import load_dotenv
+from lxml import etree
 
 # OpenAI translator (default)
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 UA = "rss-translate/1.0 (+Feedly OPML pipeline)"
 
@@ -41,14 +45,32 @@ def _env_float(name: str, default: float) -> float:
 def sha1(s: str) -> str:
     return hashlib.sha1(s.encode("utf-8", errors="ignore")).hexdigest()
 
+def cache_key(translator_name: str, target_lang: str, source_text: str) -> str:
+    # BLAKE2b-128: faster than SHA-1 on long texts, and the parts are fed in without building one big string
+    h = hashlib.blake2b(digest_size=16)
+    h.update(translator_name.encode("utf-8", errors="ignore"))
+    h.update(b":")
+    h.update(target_lang.encode("utf-8", errors="ignore"))
+    h.update(b":")
+    h.update(source_text.encode("utf-8", errors="ignore"))
+    return h.hexdigest()
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_DASH_RE = re.compile(r"-{2,}")
+
 def slugify(s: str) -> str:
     s = s.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-{2,}", "-", s).strip("-")
+    s = _SLUG_RE.sub("-", s)
+    s = _DASH_RE.sub("-", s).strip("-")
     return s or "feed"
 
 def load_db(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
+    # WAL + relaxed sync: writes are batched per feed, and losing the last batch on power loss is harmless
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
     conn.execute("""
       CREATE TABLE IF NOT EXISTS translated_cache(
         key TEXT PRIMARY KEY,
@@ -65,6 +87,24 @@ def load_db(db_path: str) -> sqlite3.Connection:
         first_seen TEXT
       )
     """)
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS feed_http(
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        modified TEXT
+      )
+    """)
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS batch_jobs(
+        batch_id TEXT PRIMARY KEY,
+        created_at TEXT,
+        translator TEXT,
+        target_lang TEXT,
+        pending TEXT,
+        finished_at TEXT,
+        status TEXT
+      )
+    """)
     conn.commit()
     return conn
 
@@ -72,32 +112,70 @@ def cache_get(conn: sqlite3.Connection, key: str) -> Optional[str]:
     row = conn.execute("SELECT translated FROM translated_cache WHERE key=?", (key,)).fetchone()
     return row[0] if row else None
 
-def cache_put(conn: sqlite3.Connection, key: str, translator: str, target_lang: str, source_text: str, translated: str) -> None:
-    conn.execute(
-        "INSERT OR REPLACE INTO translated_cache(key, created_at, translator, target_lang, source_len, translated) VALUES(?,?,?,?,?,?)",
-        (key, datetime.utcnow().isoformat(), translator, target_lang, len(source_text), translated)
-    )
-    conn.commit()
+def cache_put_many(conn: sqlite3.Connection, translator: str, target_lang: str, rows: List[Tuple[str, str, str]]) -> None:
+    """Store (key, source_text, translated) rows in one transaction."""
+    now = datetime.utcnow().isoformat()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO translated_cache(key, created_at, translator, target_lang, source_len, translated) VALUES(?,?,?,?,?,?)",
+            [(key, now, translator, target_lang, len(source_text), translated) for key, source_text, translated in rows]
+        )
 
-def mark_seen(conn: sqlite3.Connection, item_id: str) -> None:
-    conn.execute("INSERT OR IGNORE INTO seen_items(item_id, first_seen) VALUES(?,?)", (item_id, datetime.utcnow().isoformat()))
-    conn.commit()
+def mark_seen_many(conn: sqlite3.Connection, item_ids: List[str]) -> None:
+    now = datetime.utcnow().isoformat()
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO seen_items(item_id, first_seen) VALUES(?,?)", [(i, now) for i in item_ids])
 
 def is_seen(conn: sqlite3.Connection, item_id: str) -> bool:
     row = conn.execute("SELECT 1 FROM seen_items WHERE item_id=?", (item_id,)).fetchone()
     return bool(row)
 
+def feed_validators(conn: sqlite3.Connection, url: str) -> Tuple[Optional[str], Optional[str]]:
+    """(etag, modified) from the last successful fetch of a feed URL, for a conditional GET."""
+    row = conn.execute("SELECT etag, modified FROM feed_http WHERE url=?", (url,)).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+def save_feed_validators(conn: sqlite3.Connection, url: str, etag: Optional[str], modified: Optional[str]) -> None:
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO feed_http(url, etag, modified) VALUES(?,?,?)", (url, etag, modified))
+
+def batch_job_add(conn: sqlite3.Connection, batch_id: str, translator: str, target_lang: str, pending: Dict[str, str]) -> None:
+    """Record a submitted Batch API job (with its {cache_key: source_text}) so a killed run can resume it."""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO batch_jobs(batch_id, created_at, translator, target_lang, pending) VALUES(?,?,?,?,?)",
+            (batch_id, datetime.utcnow().isoformat(), translator, target_lang, json.dumps(pending, ensure_ascii=False))
+        )
+
+def batch_jobs_unfinished(conn: sqlite3.Connection, translator: str) -> List[Tuple[str, str, Dict[str, str]]]:
+    rows = conn.execute(
+        "SELECT batch_id, target_lang, pending FROM batch_jobs WHERE translator=? AND finished_at IS NULL ORDER BY created_at",
+        (translator,)
+    ).fetchall()
+    return [(batch_id, target_lang, json.loads(pending)) for batch_id, target_lang, pending in rows]
+
+def batch_job_finish(conn: sqlite3.Connection, batch_id: str, status: str) -> None:
+    with conn:
+        conn.execute("UPDATE batch_jobs SET finished_at=?, status=? WHERE batch_id=?", (datetime.utcnow().isoformat(), status, batch_id))
+
 def parse_opml(opml_path: str) -> List[Tuple[str, str]]:
-    import xml.etree.ElementTree as ET
-    tree = ET.parse(opml_path)
-    root = tree.getroot()
     feeds: List[Tuple[str, str]] = []
-    for el in root.iter():
-        if el.tag.lower().endswith("outline"):
-            xmlurl = el.attrib.get("xmlUrl") or el.attrib.get("xmlurl")
-            text = el.attrib.get("text") or el.attrib.get("title") or "Feed"
-            if xmlurl:
-                feeds.append((text, xmlurl))
+    # Stream the document and drop each element once closed, so memory stays flat on large OPMLs.
+    # Attributes are read on "start" so outlines keep document order (parent before children).
+    for event, el in etree.iterparse(opml_path, events=("start", "end")):
+        if event == "start":
+            if el.tag.lower().endswith("outline"):
+                xmlurl = el.get("xmlUrl") or el.get("xmlurl")
+                text = el.get("text") or el.get("title") or "Feed"
+                if xmlurl:
+                    feeds.append((text, xmlurl))
+            continue
+        el.clear()
+        parent = el.getparent()
+        if parent is None:
+            continue
+        while el.getprevious() is not None:
+            del parent[0]
     # Deduplicate by URL preserving first title
     seen = set()
     out = []
@@ -107,34 +185,121 @@ def parse_opml(opml_path: str) -> List[Tuple[str, str]]:
             seen.add(u)
     return out
 
-def fetch_url(url: str, timeout: int) -> Optional[str]:
+# Article fetches: retry transient failures, skip pages too large to be worth extracting
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ARTICLE_BYTES = 5 * 1024 * 1024
+# Longest Retry-After we are willing to wait for; beyond that the article is skipped
+MAX_RETRY_AFTER = 60.0
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
     try:
-        r = requests.get(url, headers={"User-Agent": UA}, timeout=timeout)
-        if r.status_code >= 400:
-            return None
-        r.encoding = r.apparent_encoding or r.encoding
-        return r.text
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
     except Exception:
         return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def _detect_charset(resp: aiohttp.ClientResponse, body: bytes) -> str:
+    # No charset in Content-Type: sniff it from the bytes (legacy cp1251/GBK pages are common in these sources)
+    best = from_bytes(body).best()
+    return best.encoding if best else "utf-8"
+
+class HttpClient:
+    """
+    Shared keep-alive aiohttp session plus one semaphore per host.
+    Requests wait for their host's slot *before* the timeout starts, so a long
+    queue on one host (e.g. news.google.com) can't time requests out unsent.
+    """
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self.slots: Dict[str, asyncio.Semaphore] = {}
+        # The semaphores do the limiting; an unbounded connector never parks a request in its own queue
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": UA},
+            fallback_charset_resolver=_detect_charset,
+        )
+
+    def slot(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        if host not in self.slots:
+            self.slots[host] = asyncio.Semaphore(self.per_host)
+        return self.slots[host]
+
+    async def __aenter__(self) -> "HttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.session.close()
+
+def make_http_session(per_host: int) -> HttpClient:
+    return HttpClient(per_host)
+
+async def fetch_url(http: HttpClient, url: str, timeout: int, retries: int = 2, backoff: float = 0.3) -> Optional[str]:
+    for attempt in range(retries + 1):
+        delay = backoff * (2 ** attempt)
+        async with http.slot(url):
+            try:
+                async with http.session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                    if r.status not in RETRY_STATUSES or attempt == retries:
+                        if r.status >= 400:
+                            return None
+                        if (r.content_length or 0) > MAX_ARTICLE_BYTES:
+                            return None
+                        return await r.text(errors="replace")
+                    wait = _retry_after(r.headers.get("Retry-After"))
+                    if wait is not None:
+                        if wait > MAX_RETRY_AFTER:
+                            return None
+                        delay = max(delay, wait)
+            except asyncio.TimeoutError:
+                # The host already had the full timeout; trying again would just hold the slot that long again
+                return None
+            except aiohttp.ClientConnectionError:
+                if attempt == retries:
+                    return None
+            except Exception:
+                return None
+        # Back off without holding the host's slot
+        await asyncio.sleep(delay)
+    return None
+
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
 
 def extract_main_text(html: str) -> str:
     """
-    Best-effort text extraction (no heavy dependencies).
+    Best-effort text extraction (selectolax/lexbor, parsed in C).
     - Removes scripts/styles
     - Prefers <article> text; falls back to <main>; then body
     """
-    soup = BeautifulSoup(html, "lxml")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
+    tree = LexborHTMLParser(html)
+    for node in tree.css("script, style, noscript"):
+        node.decompose()
 
-    cand = soup.find("article") or soup.find("main") or soup.body
+    cand = tree.css_first("article") or tree.css_first("main") or tree.body
     if not cand:
         return ""
-    text = cand.get_text("\n", strip=True)
-    # Reduce boilerplate
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = cand.text(separator="\n", strip=True)
+    # Whitespace-only text nodes come back as empty fragments; drop the blank lines they leave
+    text = _BLANK_LINES_RE.sub("\n", text)
     return text
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"\s+")
+
+def strip_html(s: str) -> str:
+    """Plain text of a short HTML fragment (feed summaries); no parser needed."""
+    return _SPACES_RE.sub(" ", unescape(_TAG_RE.sub(" ", s))).strip()
+
 def truncate_for_translation(text: str, max_chars: int = 12000) -> str:
     text = text.strip()
     if len(text) <= max_chars:
@@ -144,35 +309,58 @@ def truncate_for_translation(text: str, max_chars: int = 12000) -> str:
     tail = text[-int(max_chars * 0.3):]
     return head + "\n\n[...TRUNCATED...]\n\n" + tail
 
+class RateLimiter:
+    """
+    Token bucket allowing `per_minute` acquisitions per minute.
+    A non-positive rate disables limiting.
+    """
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 class Translator:
-    def translate(self, text: str, target_lang: str) -> str:
+    async def translate(self, text: str, target_lang: str) -> str:
         raise NotImplementedError
 
+    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        # Default: one call per text
+        return list(await asyncio.gather(*[self.translate(t, target_lang=target_lang) for t in texts]))
+
 class OpenAITranslator(Translator):
-    def __init__(self, model: str, api_key: str | None):
+    def __init__(self, model: str, api_key: str | None, rpm: float = 0, max_concurrency: int = 8):
         api_key = (api_key or os.environ.get("OPENAI_API_KEY") or "").strip()
         if not api_key:
             raise SystemExit(
                 "Missing OPENAI_API_KEY. Set it in .env, or pass --api_key to translate_rss.py"
             )
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
         self.model = model
+        self.limiter = RateLimiter(rpm)
+        self.slots = asyncio.Semaphore(max_concurrency)
 
-    def translate(self, text: str, target_lang: str) -> str:
-        # Keep output strictly in target language.
-        system = (
-            "You are a precise translation engine. "
-            "Translate the user's text faithfully into the target language, preserving names, numbers, and proper nouns. "
-            "Do not add commentary. Output ONLY the translation."
-        )
-        prompt = f"Target language: {target_lang}\n\nText:\n{text}"
-        resp = self.client.responses.create(
-            model=self.model,
-            input=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt},
-            ],
-        )
+    async def _create(self, **kwargs):
+        async with self.slots:
+            await self.limiter.acquire()
+            return await self.client.responses.create(model=self.model, **kwargs)
+
+    @staticmethod
+    def _output_text(resp) -> str:
         # SDK returns a rich object; output_text is the easiest accessor
         out = getattr(resp, "output_text", None)
         if out:
@@ -188,39 +376,417 @@ class OpenAITranslator(Translator):
         except Exception:
             return ""
 
+    @staticmethod
+    def _messages(text: str, target_lang: str) -> List[Dict[str, str]]:
+        # Keep output strictly in target language.
+        system = (
+            "You are a precise translation engine. "
+            "Translate the user's text faithfully into the target language, preserving names, numbers, and proper nouns. "
+            "Do not add commentary. Output ONLY the translation."
+        )
+        prompt = f"Target language: {target_lang}\n\nText:\n{text}"
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ]
+
+    async def translate(self, text: str, target_lang: str) -> str:
+        resp = await self._create(input=self._messages(text, target_lang))
+        return self._output_text(resp)
+
+    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        if len(texts) <= 1:
+            return [await self.translate(t, target_lang=target_lang) for t in texts]
+        # One request for the whole batch so the instructions are paid for once
+        system = (
+            "You are a precise translation engine. "
+            "The user sends a JSON array of texts. Translate each text faithfully into the target language, preserving names, numbers, and proper nouns. "
+            'Reply with a JSON object {"translations": [...]} containing exactly one translation per input text, in the same order. '
+            "Do not add commentary."
+        )
+        prompt = f"Target language: {target_lang}\n\nTexts:\n{json.dumps(texts, ensure_ascii=False)}"
+        resp = await self._create(
+            input=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            text={"format": {"type": "json_object"}},
+        )
+        try:
+            out = json.loads(self._output_text(resp)).get("translations")
+        except Exception:
+            out = None
+        if not isinstance(out, list) or len(out) != len(texts) or not all(isinstance(t, str) for t in out):
+            # Model broke the contract; fall back to one call per text
+            return await super().translate_batch(texts, target_lang)
+        return [t.strip() for t in out]
+
+    async def submit_batch(self, pending: Dict[str, str], target_lang: str) -> str:
+        """Submit {custom_id: text} as one Batch API job (half price, separate rate limits); returns the batch id."""
+        fd, jsonl_path = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for custom_id, text in pending.items():
+                    f.write(json.dumps({
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {"model": self.model, "messages": self._messages(text, target_lang)},
+                    }, ensure_ascii=False) + "\n")
+            with open(jsonl_path, "rb") as f:
+                upload = await self.client.files.create(file=f, purpose="batch")
+        finally:
+            os.remove(jsonl_path)
+
+        batch = await self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"Submitted batch {batch.id} ({len(pending)} requests)")
+        return batch.id
+
+    async def wait_for_batch(self, batch_id: str, poll_seconds: float) -> Tuple[str, Dict[str, str]]:
+        """
+        Poll a batch until it finishes.
+        Returns (final status, {custom_id: translation}) for whatever came back.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_seconds)
+            batch = await self.client.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            if counts:
+                print(f"Batch {batch.id}: {batch.status} ({counts.completed}/{counts.total} done, {counts.failed} failed)")
+        if not batch.output_file_id:
+            print(f"Batch {batch.id} ended with status {batch.status} and no output")
+            return batch.status, {}
+
+        content = await self.client.files.content(batch.output_file_id)
+        out: Dict[str, str] = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                body = row["response"]["body"]
+                text = (body["choices"][0]["message"]["content"] or "").strip()
+            except Exception:
+                continue
+            if text:
+                out[row["custom_id"]] = text
+        return batch.status, out
+
 def pick_translator(api_key_override: str | None) -> Tuple[str, Translator]:
     which = (os.environ.get("TRANSLATOR") or "openai").strip().lower()
     if which == "openai":
         model = os.environ.get("OPENAI_MODEL") or "gpt-4.1-mini"
-        return which, OpenAITranslator(model=model, api_key=api_key_override)
+        return which, OpenAITranslator(
+            model=model,
+            api_key=api_key_override,
+            rpm=_env_float("OPENAI_RPM", 500),
+            max_concurrency=_env_int("OPENAI_CONCURRENCY", 8),
+        )
     raise SystemExit(f"Unsupported TRANSLATOR={which}. This pack includes OpenAI by default.")
 
-def build_rss(feed_title: str, items: List[Dict[str, str]]) -> str:
-    # Simple RSS 2.0 writer
-    def esc(s: str) -> str:
-        return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+# Characters XML 1.0 cannot carry at all; lxml refuses them, so drop them up front
+_XML_INVALID_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\uFFFE\uFFFF]")
+
+def build_rss(feed_title: str, items: List[Dict[str, str]]) -> bytes:
+    # Simple RSS 2.0 writer; lxml handles escaping and serializes in C
+    def text(parent, tag: str, value: str, **attrib) -> None:
+        etree.SubElement(parent, tag, **attrib).text = _XML_INVALID_RE.sub("", value or "")
+
     now = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S +0000")
-    out = []
-    out.append('<?xml version="1.0" encoding="UTF-8"?>')
-    out.append('<rss version="2.0">')
-    out.append("<channel>")
-    out.append(f"<title>{esc(feed_title)}</title>")
-    out.append(f"<link></link>")
-    out.append(f"<description>{esc(feed_title)}</description>")
-    out.append(f"<lastBuildDate>{now}</lastBuildDate>")
+    rss = etree.Element("rss", version="2.0")
+    ch = etree.SubElement(rss, "channel")
+    text(ch, "title", feed_title)
+    text(ch, "link", "")
+    text(ch, "description", feed_title)
+    text(ch, "lastBuildDate", now)
     for it in items:
-        out.append("<item>")
-        out.append(f"<title>{esc(it.get('title',''))}</title>")
-        out.append(f"<link>{esc(it.get('link',''))}</link>")
-        out.append(f"<guid isPermaLink=\"false\">{esc(it.get('guid',''))}</guid>")
+        item = etree.SubElement(ch, "item")
+        text(item, "title", it.get("title", ""))
+        text(item, "link", it.get("link", ""))
+        text(item, "guid", it.get("guid", ""), isPermaLink="false")
         if it.get("pubDate"):
-            out.append(f"<pubDate>{esc(it['pubDate'])}</pubDate>")
+            text(item, "pubDate", it["pubDate"])
         # Put translated text in description; keep it readable
-        desc = it.get("description","")
-        out.append(f"<description><![CDATA[{desc}]]></description>")
-        out.append("</item>")
-    out.append("</channel></rss>")
-    return "\n".join(out)
+        desc = _XML_INVALID_RE.sub("", it.get("description", ""))
+        # CDATA cannot contain "]]>"; such descriptions are written as escaped text instead
+        etree.SubElement(item, "description").text = etree.CDATA(desc) if "]]>" not in desc else desc
+    return etree.tostring(rss, xml_declaration=True, encoding="UTF-8")
+
+# Below this many characters a summary is too thin to translate on its own
+MIN_SOURCE_CHARS = 400
+
+def group_for_batches(items: List[Tuple[str, str]], size: int, max_chars: int) -> List[List[Tuple[str, str]]]:
+    """
+    Split (key, text) pairs into translation batches.
+    Texts are sorted by length so one huge article doesn't share a call with many short ones;
+    a batch closes at `size` texts or `max_chars` characters, whichever comes first.
+    """
+    batches: List[List[Tuple[str, str]]] = []
+    cur: List[Tuple[str, str]] = []
+    chars = 0
+    for key, text in sorted(items, key=lambda kv: len(kv[1])):
+        if cur and (len(cur) >= size or chars + len(text) > max_chars):
+            batches.append(cur)
+            cur, chars = [], 0
+        cur.append((key, text))
+        chars += len(text)
+    if cur:
+        batches.append(cur)
+    return batches
+
+async def prepare_entry(
+    e,
+    conn: sqlite3.Connection,
+    claimed: set,
+    http: HttpClient,
+    translator_name: str,
+    target_lang: str,
+    timeout: int,
+) -> Optional[Dict[str, str]]:
+    link = getattr(e, "link", "") or ""
+    eid = sha1((getattr(e, "id", "") or "") + link + (getattr(e, "title", "") or ""))
+    # Claim before the first await so concurrent entries/feeds never process the same item twice
+    if eid in claimed or is_seen(conn, eid):
+        return None
+    claimed.add(eid)
+
+    raw_title = getattr(e, "title", "") or ""
+    raw_summary = getattr(e, "summary", "") or getattr(e, "description", "") or ""
+    # feedparser already parsed the date into a UTC struct_time
+    pp = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
+    pub = time.strftime("%a, %d %b %Y %H:%M:%S +0000", pp) if pp else ""
+
+    # Choose source text to translate: a long enough summary saves fetching the article at all
+    summary_plain = strip_html(raw_summary) if raw_summary else ""
+    if len(summary_plain) >= MIN_SOURCE_CHARS or not link:
+        source_text = summary_plain
+    else:
+        # Fetch article text best-effort
+        article_text = ""
+        html = await fetch_url(http, link, timeout=timeout)
+        if html:
+            article_text = extract_main_text(html).strip()
+        source_text = article_text if len(article_text) >= MIN_SOURCE_CHARS else summary_plain
+
+    source_text = truncate_for_translation(source_text, max_chars=12000)
+    return {
+        "eid": eid,
+        "title": raw_title,
+        "link": link,
+        "pubDate": pub,
+        "source_text": source_text,
+        "cache_key": cache_key(translator_name, target_lang, source_text),
+    }
+
+async def translate_entries(
+    prepared: List[Dict[str, str]],
+    conn: sqlite3.Connection,
+    translator_name: str,
+    translator: Translator,
+    target_lang: str,
+) -> Dict[str, str]:
+    """Return translations keyed by cache key; cache misses are translated in batches."""
+    translations: Dict[str, str] = {}
+    misses: Dict[str, str] = {}
+    for p in prepared:
+        key = p["cache_key"]
+        if key in translations or key in misses:
+            continue
+        hit = cache_get(conn, key)
+        if hit:
+            translations[key] = hit
+        else:
+            misses[key] = p["source_text"]
+
+    batches = group_for_batches(
+        list(misses.items()),
+        size=max(1, _env_int("TRANSLATE_BATCH_SIZE", 8)),
+        max_chars=_env_int("TRANSLATE_BATCH_MAX_CHARS", 24000),
+    )
+    results = await asyncio.gather(*[
+        translator.translate_batch([text for _, text in batch], target_lang=target_lang)
+        for batch in batches
+    ])
+    rows = []
+    for batch, outs in zip(batches, results):
+        for (key, source_text), translated in zip(batch, outs):
+            if not translated:
+                translated = source_text  # last resort
+            rows.append((key, source_text, translated))
+            translations[key] = translated
+    if rows:
+        cache_put_many(conn, translator_name, target_lang, rows)
+    return translations
+
+def build_item(p: Dict[str, str], translated: str, target_lang: str) -> Dict[str, str]:
+    source_text = p["source_text"]
+    # Build description: include both (short)
+    # Put translation first; keep a short original snippet for audit
+    orig_snip = (source_text[:600] + "...") if len(source_text) > 600 else source_text
+    desc = "<p><b>Translated:</b></p><p>" + translated.replace("\n", "<br/>") + "</p>"
+    desc += "<hr/><p><b>Original snippet:</b></p><p>" + orig_snip.replace("\n", "<br/>") + "</p>"
+    return {
+        "title": f"[{target_lang.upper()}] {p['title']}",
+        "link": p["link"],
+        "guid": p["eid"],
+        "pubDate": p["pubDate"],
+        "description": desc
+    }
+
+@dataclass
+class CollectedFeed:
+    title: str
+    url: str
+    entries: List[Dict[str, str]]
+    etag: Optional[str] = None
+    modified: Optional[str] = None
+
+def feed_out_path(out_dir: str, title: str, target_lang: str) -> str:
+    return os.path.join(out_dir, slugify(title) + f".{target_lang}.xml")
+
+async def collect_feed(
+    title: str,
+    url: str,
+    feed_slots: asyncio.Semaphore,
+    out_dir: str,
+    max_items: int,
+    conn: sqlite3.Connection,
+    claimed: set,
+    http: HttpClient,
+    translator_name: str,
+    target_lang: str,
+    timeout: int,
+) -> Optional[CollectedFeed]:
+    """Fetch and prepare a feed's new entries; None if the feed is unchanged since the last run."""
+    async with feed_slots:
+        print(f"\n==> {title} :: {url}")
+        # Conditional GET, but only when there is a previous output to keep
+        etag, modified = (None, None)
+        if os.path.exists(feed_out_path(out_dir, title, target_lang)):
+            etag, modified = feed_validators(conn, url)
+        # feedparser does blocking network I/O; keep it off the event loop
+        parsed = await asyncio.to_thread(feedparser.parse, url, etag=etag, modified=modified)
+        if parsed.get("status") == 304:
+            print(f"Unchanged (304): {title}")
+            return None
+        entries = parsed.entries[:max_items]
+        prepared = await asyncio.gather(*[
+            prepare_entry(e, conn, claimed, http, translator_name, target_lang, timeout)
+            for e in entries
+        ])
+    return CollectedFeed(
+        title=title,
+        url=url,
+        entries=[p for p in prepared if p],
+        etag=parsed.get("etag"),
+        modified=parsed.get("modified"),
+    )
+
+def write_feed(
+    feed: CollectedFeed,
+    out_dir: str,
+    translations: Dict[str, str],
+    conn: sqlite3.Connection,
+    target_lang: str,
+) -> None:
+    out_items = [build_item(p, translations[p["cache_key"]], target_lang) for p in feed.entries]
+    mark_seen_many(conn, [p["eid"] for p in feed.entries])
+
+    out_title = f"{feed.title} (Translated → {target_lang})"
+    rss_xml = build_rss(out_title, out_items)
+
+    out_path = feed_out_path(out_dir, feed.title, target_lang)
+    with open(out_path, "wb") as f:
+        f.write(rss_xml)
+    # Record validators only once the output is written, so a failed run never leaves a feed looking up to date
+    if feed.etag or feed.modified:
+        save_feed_validators(conn, feed.url, feed.etag, feed.modified)
+    print(f"Saved: {out_path}  (items: {len(out_items)})")
+
+async def collect_batch(
+    conn: sqlite3.Connection,
+    translator_name: str,
+    translator: OpenAITranslator,
+    batch_id: str,
+    target_lang: str,
+    pending: Dict[str, str],
+    poll_seconds: float,
+) -> None:
+    """Wait for a submitted batch, cache its translations and mark the job finished."""
+    status, results = await translator.wait_for_batch(batch_id, poll_seconds=poll_seconds)
+    cache_put_many(conn, translator_name, target_lang, [(key, pending[key], translated) for key, translated in results.items() if key in pending])
+    batch_job_finish(conn, batch_id, status)
+    print(f"Batch API: cached {len(results)}/{len(pending)} translations from {batch_id}")
+
+async def translate_via_batch_api(
+    prepared: List[Dict[str, str]],
+    conn: sqlite3.Connection,
+    translator_name: str,
+    translator: Translator,
+    target_lang: str,
+) -> None:
+    """Fill the translation cache for every uncached entry with a single Batch API job."""
+    if not isinstance(translator, OpenAITranslator):
+        raise SystemExit("--batch_api requires TRANSLATOR=openai")
+    poll_seconds = _env_float("BATCH_POLL_SECONDS", 60)
+    # Finish jobs a previous run submitted but never collected before paying for the same texts again
+    for batch_id, job_lang, job_pending in batch_jobs_unfinished(conn, translator_name):
+        print(f"\nBatch API: resuming batch {batch_id} ({len(job_pending)} texts)")
+        await collect_batch(conn, translator_name, translator, batch_id, job_lang, job_pending, poll_seconds)
+
+    pending: Dict[str, str] = {}
+    for p in prepared:
+        if p["cache_key"] not in pending and not cache_get(conn, p["cache_key"]):
+            pending[p["cache_key"]] = p["source_text"]
+    if not pending:
+        print("\nBatch API: nothing to translate (all cached)")
+        return
+
+    print(f"\nBatch API: {len(pending)} uncached texts")
+    batch_id = await translator.submit_batch(pending, target_lang)
+    # Persist before polling: if this run is killed, the next one resumes the (already paid for) batch
+    batch_job_add(conn, batch_id, translator_name, target_lang, pending)
+    await collect_batch(conn, translator_name, translator, batch_id, target_lang, pending, poll_seconds)
+
+async def translate_feeds(
+    feeds: List[Tuple[str, str]],
+    conn: sqlite3.Connection,
+    translator_name: str,
+    translator: Translator,
+    target_lang: str,
+    out_dir: str,
+    timeout: int,
+    max_items: int,
+    batch_api: bool = False,
+) -> None:
+    feed_slots = asyncio.Semaphore(_env_int("FEED_CONCURRENCY", 16))
+    claimed: set = set()
+
+    async def process_feed(title: str, url: str) -> Optional[CollectedFeed]:
+        feed = await collect_feed(
+            title, url, feed_slots, out_dir, max_items,
+            conn, claimed, http, translator_name, target_lang, timeout,
+        )
+        if feed and not batch_api:
+            translations = await translate_entries(feed.entries, conn, translator_name, translator, target_lang)
+            write_feed(feed, out_dir, translations, conn, target_lang)
+        return feed
+
+    async with make_http_session(_env_int("HTTP_CONNECTIONS_PER_HOST", 4)) as http:
+        collected = [f for f in await asyncio.gather(*[process_feed(title, url) for (title, url) in feeds]) if f]
+
+    if batch_api:
+        # Phase 1 only collected entries; fill the cache offline, then assemble feeds from it.
+        # Anything the batch failed to return is translated live as usual.
+        await translate_via_batch_api([p for f in collected for p in f.entries], conn, translator_name, translator, target_lang)
+        for feed in collected:
+            translations = await translate_entries(feed.entries, conn, translator_name, translator, target_lang)
+            write_feed(feed, out_dir, translations, conn, target_lang)
 
 def main():
     load_dotenv()
@@ -230,6 +796,7 @@ def main():
     ap.add_argument("--db", default="output/cache.sqlite", help="SQLite cache path")
     ap.add_argument("--only_lang_ceid", default="", help="Optional: filter Google News feeds by ceid suffix (e.g. ':ru' ':fa' ':zh-Hans' ':ar')")
     ap.add_argument("--api_key", default="", help="OpenAI API key (optional; overrides OPENAI_API_KEY env var)")
+    ap.add_argument("--batch_api", action="store_true", help="Translate uncached items via the OpenAI Batch API (cheaper, may take hours)")
     args = ap.parse_args()
 
     target_lang = (os.environ.get("TRANSLATE_TARGET_LANG") or "en").strip().lower()
@@ -246,74 +813,10 @@ def main():
     if args.only_lang_ceid:
         feeds = [(t,u) for (t,u) in feeds if args.only_lang_ceid in u]
 
-    for (title, url) in feeds:
-        print(f"\n==> {title} :: {url}")
-        parsed = feedparser.parse(url)
-        entries = parsed.entries[:max_items]
-        out_items = []
-        for e in entries:
-            link = getattr(e, "link", "") or ""
-            eid = sha1((getattr(e, "id", "") or "") + link + (getattr(e, "title", "") or ""))
-            if is_seen(conn, eid):
-                continue
-
-            raw_title = getattr(e, "title", "") or ""
-            raw_summary = getattr(e, "summary", "") or getattr(e, "description", "") or ""
-            pub = ""
-            try:
-                dt = None
-                if getattr(e, "published", None):
-                    dt = dateparser.parse(e.published)
-                elif getattr(e, "updated", None):
-                    dt = dateparser.parse(e.updated)
-                if dt:
-                    pub = dt.strftime("%a, %d %b %Y %H:%M:%S +0000")
-            except Exception:
-                pub = ""
-
-            # Fetch article text best-effort
-            article_text = ""
-            if link:
-                html = fetch_url(link, timeout=timeout)
-                if html:
-                    article_text = extract_main_text(html)
-
-            # Choose source text to translate
-            source_text = article_text.strip() if len(article_text.strip()) >= 400 else BeautifulSoup(raw_summary, "lxml").get_text(" ", strip=True)
-
-            source_text = truncate_for_translation(source_text, max_chars=12000)
-            cache_key = sha1(f"{translator_name}:{target_lang}:{source_text}")
-
-            translated = cache_get(conn, cache_key)
-            if not translated:
-                translated = translator.translate(source_text, target_lang=target_lang)
-                if not translated:
-                    translated = source_text  # last resort
-                cache_put(conn, cache_key, translator_name, target_lang, source_text, translated)
-
-            # Build description: include both (short)
-            # Put translation first; keep a short original snippet for audit
-            orig_snip = (source_text[:600] + "...") if len(source_text) > 600 else source_text
-            desc = "<p><b>Translated:</b></p><p>" + translated.replace("\n", "<br/>") + "</p>"
-            desc += "<hr/><p><b>Original snippet:</b></p><p>" + orig_snip.replace("\n", "<br/>") + "</p>"
-
-            out_items.append({
-                "title": f"[{target_lang.upper()}] {raw_title}",
-                "link": link,
-                "guid": eid,
-                "pubDate": pub,
-                "description": desc
-            })
-            mark_seen(conn, eid)
-
-        out_title = f"{title} (Translated → {target_lang})"
-        rss_xml = build_rss(out_title, out_items)
-
-        fname = slugify(title) + f".{target_lang}.xml"
-        out_path = os.path.join(args.out_dir, fname)
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(rss_xml)
-        print(f"Saved: {out_path}  (items: {len(out_items)})")
+    asyncio.run(translate_feeds(
+        feeds, conn, translator_name, translator, target_lang, args.out_dir, timeout, max_items,
+        batch_api=args.batch_api,
+    ))
 
 if __name__ == "__main__":
     main()